@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 
 
-import re, html, difflib, datetime, time
+import functools, gzip, hashlib, io, re, html, difflib, datetime, time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# optional C++-accelerated gate for diff_magnitude; pure-Python fallback below
+try:
+    from rapidfuzz.distance import Indel as _Indel
+except ImportError:
+    _Indel = None
 from typing import List, Dict, Tuple
-from flask import Flask, request, abort
+from flask import Flask, Response, request, abort
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 app = Flask(__name__)
 
@@ -26,6 +36,18 @@ PRESETS = {
                        label="H.R. 133 (116th) — Consolidated Appropriations Act, 2021"),
 }
 
+STAGE_MAP = {
+    "ih": "Introduced (IH)", "rh": "Reported (RH)",
+    "eh": "Engrossed (EH)",  "enr": "Enrolled (ENR)",
+}
+
+# precompute per-preset derived fields so the request path just reads them
+for _cfg in PRESETS.values():
+    _cfg["v1"] = _cfg["v1"].lower()
+    _cfg["v2"] = _cfg["v2"].lower()
+    _cfg["stage_a"] = STAGE_MAP.get(_cfg["v1"], _cfg["v1"].upper())
+    _cfg["stage_b"] = STAGE_MAP.get(_cfg["v2"], _cfg["v2"].upper())
+
 # HTTP session
 S = requests.Session()
 S.headers.update({
@@ -33,16 +55,37 @@ S.headers.update({
                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
 })
-
-# tiny cache (html per preset)
-CACHE: Dict[str, Tuple[float, str]] = {}
+# keep TCP+TLS warm across the candidate-probing loop, retry transient 5xx
+_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                       max_retries=Retry(total=2, backoff_factor=0.2,
+                                         status_forcelist=[502, 503, 504]))
+S.mount("https://", _ADAPTER)
+S.mount("http://", _ADAPTER)
+
+# tiny cache (gzipped html + etag per preset)
+CACHE: Dict[str, Tuple[float, bytes, str]] = {}
 CACHE_TTL = 6 * 60 * 60
 
+# parsed sections per bill version — survives HTML-cache flushes and lets a
+# version shared by several presets be fetched/sanitized/split only once
+VERSION_CACHE: Dict[Tuple[int, str, int, str], Tuple[float, List[Dict]]] = {}
+
+# unchanged section bodies per preset — served on demand by /section instead
+# of being embedded (hidden) in every /view response. Per-process only, so
+# /section must be able to rebuild it on a miss: under gunicorn's multiple
+# workers the hydration fetches land on workers that never rendered /view.
+UNCHANGED_CACHE: Dict[str, Dict[str, str]] = {}
+
 # quick flush route (handy while iterating)
 @app.get("/flush")
 def flush_cache():
+    # drop the rendered pages and the parsed sections behind them — flushing
+    # only CACHE would re-render from up-to-TTL-old sections
     CACHE.clear()
+    VERSION_CACHE.clear()
+    UNCHANGED_CACHE.clear()
     return "CACHE cleared"
 
 # fetching
@@ -56,7 +99,10 @@ def billtype(chamber: str) -> str:
 def pkg_id(cong: int, chamber: str, num: int, ver: str) -> str:
     return f"BILLS-{cong}{billtype(chamber)}{num}{ver.lower()}"
 
+@functools.lru_cache(maxsize=64)
 def url_candidates(cong: int, chamber: str, num: int, ver: str):
+    # the candidate list is pure string formatting over a handful of presets;
+    # memoize so repeat views (and the per-candidate race) reuse one tuple
     bp  = chamber_path(chamber)
     bt  = billtype(chamber)
     pkg = pkg_id(cong, chamber, num, ver)
@@ -71,7 +117,7 @@ def url_candidates(cong: int, chamber: str, num: int, ver: str):
     bulk_xml = f"https://www.govinfo.gov/bulkdata/BILLS/{cong}/{bt}/BILLS-{cong}{bt}{num}{ver.lower()}.xml"
     bulk_htm = f"https://www.govinfo.gov/bulkdata/BILLS/{cong}/{bt}/BILLS-{cong}{bt}{num}{ver.lower()}.htm"
 
-    return [
+    return (
         ("gi_txt",  gi_txt),
         ("gi_xml",  gi_xml),
         ("gi_htm",  gi_htm),
@@ -79,90 +125,165 @@ def url_candidates(cong: int, chamber: str, num: int, ver: str):
         ("bulk_htm", bulk_htm),
         ("cg_txt",  cg_txt),
         ("cg_html", cg_html),
-    ]
+    )
+
+# single-pass tag scanners: one alternation dispatched on lastgroup, so each
+# document is walked once instead of once per re.sub
+HTML_PAT = re.compile(
+    r"(?P<script><(script|style)[^>]*>.*?</\2>)"
+    r"|(?P<br><br\s*/?>)"
+    r"|(?P<pend></p>)"
+    r"|(?P<block></(h\d|div|section|li|tr|td|thead|tbody)>)"
+    r"|(?P<listart><li[^>]*>)"
+    r"|(?P<tag><[^>]+>)",
+    re.I | re.S)
+_HTML_REPL = {"script": " ", "br": "\n", "pend": "\n\n", "block": "\n", "listart": " • ", "tag": " "}
+
+_XML_BLOCK_TAGS = r"(officialTitle|shortTitle|longTitle|title|section|subsection|paragraph|subparagraph|text|quotedBlock)"
+XML_PAT = re.compile(
+    fr"(?P<block></?{_XML_BLOCK_TAGS}[^>]*>)"
+    r"|(?P<nstart><note[^>]*>)"
+    r"|(?P<nend></note>)"
+    r"|(?P<tag><[^>]+>)",
+    re.I | re.S)
+_XML_REPL = {"block": "\n", "nstart": " (Note: ", "nend": ") ", "tag": " "}
+
+# shared precompiled patterns (hot per-request text passes)
+_WS_RE         = re.compile(r"[ \t]+")
+_TRIPLE_NL_RE  = re.compile(r"\n\s*\n\s*\n+")
+_MULTI_NL_RE   = re.compile(r"\n{3,}")
+_PUNCT_SPACE_RE = re.compile(r" \s*([,.;:])")
+_PAREN_OPEN_RE  = re.compile(r"\(\s+")
+_PAREN_CLOSE_RE = re.compile(r"\s+\)")
+_BRACK_OPEN_RE  = re.compile(r"\[\s+")
+_BRACK_CLOSE_RE = re.compile(r"\s+\]")
+_ANY_WS_RE      = re.compile(r"\s+")
+_EDGE_SPACE_RE  = re.compile(r"(?m)^ +| +$")
+# a lone newline between two non-blank lines where the first doesn't end a
+# sentence — i.e. a wrapped continuation line that should be unwrapped
+_JOIN_NL_RE     = re.compile(r"(?<=[^\n.;:)])\n(?=[^\n])")
+_CR_NBSP_TABLE  = str.maketrans({"\r": "\n", "\u00A0": " "})
+_ERR_RE = re.compile(r"(Page Not Found|Error occurred|cannot be found|Access Denied|Forbidden|Drupal|govinfo error)", re.I)
+_ERR_BYTES_RE = re.compile(rb"(Page Not Found|Error occurred|cannot be found|Access Denied|Forbidden|Drupal|govinfo error)", re.I)
+
+def _html_repl(m) -> str:
+    return _HTML_REPL[m.lastgroup]
+
+def _xml_repl(m) -> str:
+    return _XML_REPL[m.lastgroup]
 
 def html_to_text(s: str) -> str:
-    s = re.sub(r"(?is)<(script|style)[^>]*>.*?</\1>", " ", s)
-    s = re.sub(r"(?is)<br\s*/?>", "\n", s)
-    s = re.sub(r"(?is)</p>", "\n\n", s)
-    s = re.sub(r"(?is)</(h\d|div|section|li|tr|td|thead|tbody)>", "\n", s)
-    s = re.sub(r"(?is)<li[^>]*>", " • ", s)
-    s = re.sub(r"(?is)<[^>]+>", " ", s)
+    s = HTML_PAT.sub(_html_repl, s)
     s = s.replace("\u00A0", " ")
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r"\n\s*\n\s*\n+", "\n\n", s)
+    s = _WS_RE.sub(" ", s)
+    s = _TRIPLE_NL_RE.sub("\n\n", s)
     return s.strip()
 
 def xml_to_text(s: str) -> str:
-    block_tags = r"(officialTitle|shortTitle|longTitle|title|section|subsection|paragraph|subparagraph|text|quotedBlock)"
-    s = re.sub(fr"(?is)<{block_tags}[^>]*>", "\n", s)
-    s = re.sub(fr"(?is)</{block_tags}>", "\n", s)
-    s = re.sub(r"(?is)<note[^>]*>", " (Note: ", s)
-    s = re.sub(r"(?is)</note>", ") ", s)
-    s = re.sub(r"(?is)<[^>]+>", " ", s)
+    s = XML_PAT.sub(_xml_repl, s)
     s = s.replace("\u00A0", " ")
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r"\n\s*\n\s*\n+", "\n\n", s)
+    s = _WS_RE.sub(" ", s)
+    s = _TRIPLE_NL_RE.sub("\n\n", s)
     return s.strip()
 
 def looks_like_error(text: str) -> bool:
     if len(text.strip()) < 800:
         return True
-    if re.search(r"(Page Not Found|Error occurred|cannot be found|Access Denied|Forbidden|Drupal|govinfo error)", text, re.I):
+    if _ERR_RE.search(text):
         return True
     return False
 
+def _parse_fetched(kind: str, raw: str) -> str:
+    if kind.endswith("txt"):
+        t = raw.replace("\r\n", "\n")
+    elif kind.endswith("xml"):
+        t = xml_to_text(raw)
+    else:
+        t = html_to_text(raw)
+    if looks_like_error(t):
+        raise RuntimeError("short/error")
+    return t
+
+def _close_fetched(fut):
+    # loser that completes after the winner: put its socket back in the pool
+    try:
+        fut.result().close()
+    except Exception:
+        pass
+
 def fetch_version(cong: int, chamber: str, num: int, ver: str) -> str:
+    # race all candidates instead of paying each failure's round-trip in turn;
+    # first response whose parsed text passes looks_like_error wins
+    candidates = url_candidates(cong, chamber, num, ver)
     last = None
-    for kind, url in url_candidates(cong, chamber, num, ver):
-        try:
-            r = S.get(url, timeout=60, allow_redirects=True)
-            r.raise_for_status()
-            raw = r.text
-            if kind.endswith("txt"):
-                t = raw.replace("\r\n", "\n")
-            elif kind.endswith("xml"):
-                t = xml_to_text(raw)
-            else:
-                t = html_to_text(raw)
-            if looks_like_error(t):
-                raise RuntimeError("short/error")
-            return t
-        except Exception as e:
-            last = e
-            time.sleep(0.2)
-            continue
+    from concurrent.futures import as_completed
+    # no `with`: the context exit would join every future, making each miss
+    # wait on the slowest candidate; losers are closed by callback instead
+    ex = ThreadPoolExecutor(max_workers=len(candidates))
+    try:
+        futs = {ex.submit(S.get, url, timeout=30, allow_redirects=True, stream=True): kind
+                for kind, url in candidates}
+        for fut in as_completed(futs):
+            kind = futs[fut]
+            try:
+                r = fut.result()
+                try:
+                    r.raise_for_status()
+                    raw = r.content
+                    # cheap bytes-level reject before paying the full decode
+                    if len(raw) < 800 or _ERR_BYTES_RE.search(raw):
+                        raise RuntimeError("short/error")
+                    t = _parse_fetched(kind, raw.decode(r.encoding or "utf-8", errors="replace"))
+                finally:
+                    r.close()
+                for other in futs:
+                    if other is not fut:
+                        other.add_done_callback(_close_fetched)
+                return t
+            except Exception as e:
+                last = e
+                continue
+    finally:
+        # abandon whatever is still in flight without waiting for it
+        ex.shutdown(wait=False, cancel_futures=True)
     raise RuntimeError(f"failed to fetch {ver}: {last}")
 
+def get_sections(cong: int, chamber: str, num: int, ver: str, fresh: bool = False) -> List[Dict]:
+    # cache the expensive intermediate (sanitized + sectioned text) per version;
+    # fresh=True forces a refetch (still repopulating the cache)
+    key = (cong, chamber, num, ver)
+    ent = None if fresh else VERSION_CACHE.get(key)
+    if ent and (time.time() - ent[0]) < CACHE_TTL:
+        return ent[1]
+    secs = split_sections(sanitize_text(fetch_version(cong, chamber, num, ver)))
+    VERSION_CACHE[key] = (time.time(), secs)
+    return secs
+
 # diff & structure
 def sanitize_text(s: str) -> str:
-    s = s.replace("\r\n", "\n").replace("\r", "\n").replace("\u00A0", " ")
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r" \s*([,.;:])", r"\1", s)
-    s = re.sub(r"\(\s+", "(", s); s = re.sub(r"\s+\)", ")", s)
-    s = re.sub(r"\[\s+", "[", s); s = re.sub(r"\s+\]", "]", s)
-    out, buf = [], []
-    for ln in s.split("\n"):
-        t = ln.strip()
-        if not t:
-            if buf: out.append(" ".join(buf)); buf = []
-            out.append("")
-            continue
-        buf.append(t)
-        if re.search(r"[.;:)]\s*$", t):
-            out.append(" ".join(buf)); buf = []
-    if buf: out.append(" ".join(buf))
-    s = "\n".join(out)
-    s = re.sub(r"\n{3,}", "\n\n", s).strip()
-    return s
-
-# STRICT header: only "SEC./Sec." at line-start (avoids references like “section 12 U.S.C.”)
-SEC_RE = re.compile(r'^(?:SEC\.|Sec\.)\s+(\d+[A-Za-z\-]*)[.: ]', re.MULTILINE)
-
-# broader fallbacks if no SEC headings are found
-TITLE_RE     = re.compile(r'^(?:TITLE\s+[IVXLC]+(?:\s*[\u2014—-].*)?)$', re.MULTILINE)
-DIVISION_RE  = re.compile(r'^(?:DIVISION\s+[A-Z](?:\s*[\u2014—-].*)?)$', re.MULTILINE)
-SUBTITLE_RE  = re.compile(r'^(?:SUBTITLE\s+[A-Z](?:\s*[\u2014—-].*)?)$', re.MULTILINE)
+    s = s.replace("\r\n", "\n").translate(_CR_NBSP_TABLE)
+    s = _WS_RE.sub(" ", s)
+    s = _PUNCT_SPACE_RE.sub(r"\1", s)
+    s = _PAREN_OPEN_RE.sub("(", s); s = _PAREN_CLOSE_RE.sub(")", s)
+    s = _BRACK_OPEN_RE.sub("[", s); s = _BRACK_CLOSE_RE.sub("]", s)
+    # unwrap continuation lines entirely in the regex engine: trim line edges,
+    # then splice any newline that doesn't follow sentence-ending punctuation
+    s = _EDGE_SPACE_RE.sub("", s)
+    s = _JOIN_NL_RE.sub(" ", s)
+    s = _MULTI_NL_RE.sub("\n\n", s).strip()
+    # escape once here so every downstream consumer (diff, titles, bodies)
+    # can emit corpus text into HTML without re-escaping
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+# one combined scanner: strict "SEC./Sec." headers (avoids references like
+# “section 12 U.S.C.”) plus the broader DIVISION/TITLE/SUBTITLE fallbacks,
+# classified per match via lastgroup so the text is walked only once
+SPLIT_RE = re.compile(
+    r'^(?:(?P<sec>(?:SEC\.|Sec\.)\s+(?P<secnum>\d+[A-Za-z\-]*)[.: ][ \t]*(?P<sectitle>[^\n]*))'
+    r'|(?P<div>DIVISION\s+[A-Z](?:\s*[\u2014—-].*)?$)'
+    r'|(?P<title>TITLE\s+[IVXLC]+(?:\s*[\u2014—-].*)?$)'
+    r'|(?P<sub>SUBTITLE\s+[A-Z](?:\s*[\u2014—-].*)?$))',
+    re.MULTILINE)
 
 def _split_by_matches(raw: str, matches: List[re.Match], id_prefix: str) -> List[Dict]:
     blocks = []
@@ -170,34 +291,33 @@ def _split_by_matches(raw: str, matches: List[re.Match], id_prefix: str) -> List
         start = m.start()
         end   = matches[i+1].start() if i+1 < len(matches) else len(raw)
         header = m.group(0).strip()
-        chunk  = raw[start:end].strip()
         sec_id = f"{id_prefix}{i+1:03d}"
         title  = header
-        body   = chunk[len(header):].strip()
+        body   = raw[m.end():end].strip()
         blocks.append({"sec_id": sec_id, "title": title, "body": body})
     return blocks
 
 def split_sections(raw: str) -> List[Dict]:
-    sec = list(SEC_RE.finditer(raw))
+    buckets = {"sec": [], "div": [], "title": [], "sub": []}
+    for m in SPLIT_RE.finditer(raw):
+        buckets[m.lastgroup if m.lastgroup != "secnum" else "sec"].append(m)
+    sec = buckets["sec"]
     # if we found sane number of real sections, use them
     if sec and len(sec) <= 800:
+        # work from match offsets: the header line is fully captured by the
+        # regex, so the body is a single slice instead of block+tail copies
         out = []
         for i, m in enumerate(sec):
-            sid   = m.group(1)
-            start = m.start()
+            sid   = m.group("secnum")
             end   = sec[i+1].start() if i+1 < len(sec) else len(raw)
-            block = raw[start:end].strip()
-            head  = block.split("\n", 1)[0]
-            m2 = re.search(r'^(?:SEC\.|Sec\.)\s+\d+[A-Za-z\-]*[.: ]\s*(.*)$', head)
-            title = (m2.group(1).strip() if m2 else head) or f"Section {sid}"
-            body  = block[len(head):].strip()
+            title = m.group("sectitle").strip() or f"Section {sid}"
+            body  = raw[m.end():end].strip()
             out.append({"sec_id": sid, "title": title, "body": body})
         return out
-    # fallbacks
-    for rx, pref in [(DIVISION_RE, "DIV"), (TITLE_RE, "TITLE"), (SUBTITLE_RE, "SUB")]:
-        m = list(rx.finditer(raw))
-        if m:
-            return _split_by_matches(raw, m, pref)
+    # fallbacks, in the same priority order as before
+    for kind, pref in [("div", "DIV"), ("title", "TITLE"), ("sub", "SUB")]:
+        if buckets[kind]:
+            return _split_by_matches(raw, buckets[kind], pref)
     # last resort
     return [{"sec_id":"ALL", "title":"FULL TEXT", "body":raw.strip()}]
 
@@ -205,23 +325,58 @@ def index_by_id(sections: List[Dict]) -> Dict[str, Dict]:
     return {s["sec_id"]: s for s in sections}
 
 TOKEN_RE = re.compile(r"\S+|\s+")
-def esc(s: str) -> str: return html.escape(s, quote=False)
+
+# one C-level pass via str.translate instead of html.escape's three replaces
+_ESC_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+def esc(s: str) -> str: return s.translate(_ESC_TABLE)
+
+def crop_escaped(s: str, limit: int) -> str:
+    # corpus text is pre-escaped, so a blind slice can cut an &amp;/&lt;/&gt;
+    # entity in half; back the crop off to before a dangling ampersand
+    if len(s) <= limit:
+        return s
+    cut = s[:limit]
+    amp = cut.rfind("&")
+    if amp != -1 and ";" not in cut[amp:]:
+        return cut[:amp]
+    return cut
 
 def diff_words_preserve_ws(a: str, b: str) -> str:
+    # inputs come from sanitize_text and are already HTML-escaped
+    if a == b:
+        return a
     a_tok = TOKEN_RE.findall(a)
     b_tok = TOKEN_RE.findall(b)
-    sm = difflib.SequenceMatcher(a=a_tok, b=b_tok)
-    out = []
+
+    # strip common prefix/suffix so SequenceMatcher only sees the changed middle
+    n = min(len(a_tok), len(b_tok))
+    p = 0
+    while p < n and a_tok[p] == b_tok[p]:
+        p += 1
+    q = 0
+    while q < n - p and a_tok[-1 - q] == b_tok[-1 - q]:
+        q += 1
+
+    # intern tokens to small ints so SequenceMatcher's inner loop compares
+    # ints instead of hashing/comparing strings
+    vocab: Dict[str, int] = {}
+    a_ids = [vocab.setdefault(t, len(vocab)) for t in a_tok[p:len(a_tok) - q]]
+    b_ids = [vocab.setdefault(t, len(vocab)) for t in b_tok[p:len(b_tok) - q]]
+
+    sm = difflib.SequenceMatcher(a=a_ids, b=b_ids)
+    out = ["".join(a_tok[:p])]
     for tag, i1, i2, j1, j2 in sm.get_opcodes():
-        A = "".join(a_tok[i1:i2]); B = "".join(b_tok[j1:j2])
+        A = "".join(a_tok[p + i1:p + i2]); B = "".join(b_tok[p + j1:p + j2])
         if tag == "equal":
-            out.append(esc(A))
+            out.append(A)
         elif tag == "delete":
-            out.append(f"<del>{esc(A)}</del>")
+            out.append(f"<del>{A}</del>")
         elif tag == "insert":
-            out.append(f"<ins>{esc(B)}</ins>")
+            out.append(f"<ins>{B}</ins>")
         else:
-            out.append(f"<del>{esc(A)}</del><ins>{esc(B)}</ins>")
+            out.append(f"<del>{A}</del><ins>{B}</ins>")
+    if q:
+        out.append("".join(a_tok[len(a_tok) - q:]))
     return "".join(out)
 
 MIN_DIFF_TOKENS = 80          # ignore micro-changes smaller than 6 tokens total
@@ -229,25 +384,27 @@ MIN_EQUAL_RATIO = 0.777         # 77.7% similarity or higher => treat as unchang
 
 def _tokenize_for_ratio(s: str) -> list:
     # coalesce whitespace to single spaces to reduce formatting noise
-    s = re.sub(r"\s+", " ", s.strip())
+    s = _ANY_WS_RE.sub(" ", s.strip())
     return s.split(" ") if s else []
 
 def diff_magnitude(a: str, b: str) -> Tuple[int, float]:
-    """Return (changed_token_count, equal_ratio) using a token diff that
-    down-weights whitespace-only edits."""
+    """Return (changed_token_count, equal_ratio) via a token-multiset overlap.
+
+    This is only a magnitude guard, so a Counter-based Jaccard ratio is
+    enough: O(N+M) instead of SequenceMatcher's quadratic worst case.
+    The precise word-level diff still happens in diff_words_preserve_ws."""
     a_t = _tokenize_for_ratio(a)
     b_t = _tokenize_for_ratio(b)
-    sm = difflib.SequenceMatcher(a=a_t, b=b_t, autojunk=False)
-    equal = 0
-    total = 0
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
-        if tag == "equal":
-            equal += (i2 - i1)
-        total += max(i2 - i1, j2 - j1)
-    equal_ratio = (equal / total) if total else 1.0
-
-    # approximate "changed tokens" as the non-equal portion
-    changed = total - equal
+    if _Indel is not None:
+        changed = _Indel.distance(a_t, b_t)
+        return changed, _Indel.normalized_similarity(a_t, b_t)
+    ca, cb = Counter(a_t), Counter(b_t)
+    inter = sum((ca & cb).values())
+    union = sum((ca | cb).values())
+    equal_ratio = (inter / union) if union else 1.0
+
+    # approximate "changed tokens" as the non-overlapping portion
+    changed = union - inter
     return changed, equal_ratio
 
 APPROPS_HINTS = re.compile(
@@ -257,15 +414,24 @@ APPROPS_HINTS = re.compile(
     re.IGNORECASE
 )
 
+# one combined multi-pattern scan: a single pass flips tag flags via
+# lastgroup, instead of three separate full-text searches
+_TAGS_RE = re.compile(
+    r'(?=(?P<Funding>\$[\s]?\d|\bappropriat|\bauthorized to be appropriated|\bgrant\b|\bfund(?:s|ing)?)'
+    r'|(?P<Authority>\bshall\b|\bmay not\b|\bpenalt)'
+    r'|(?P<Reporting>not later than|\breport to congress|\bgao\b|\breporting requirement))')
+
 def categorize_change(before: str, after: str) -> List[str]:
+    # scan each side separately: no concatenated copy, and .lower() is skipped
+    # entirely for the (common) empty side
     tags = set()
-    t = (before + " " + after).lower()
-    if re.search(r'(\$[\s]?\d|\bappropriat|\bauthorized to be appropriated|\bgrant\b|\bfund(?:s|ing)?)', t):
-        tags.add("Funding")
-    if re.search(r'\bshall\b|\bmay not\b|\bpenalt', t):
-        tags.add("Authority")
-    if re.search(r'not later than|\breport to congress|\bgao\b|\breporting requirement', t):
-        tags.add("Reporting")
+    for s in (before, after):
+        if not s:
+            continue
+        for m in _TAGS_RE.finditer(s.lower()):
+            tags.add(m.lastgroup)
+            if len(tags) == 3:
+                return sorted(tags)
     return sorted(tags)
 
 def summarize_changes(old_by_id: Dict[str, Dict], new_by_id: Dict[str, Dict]) -> Tuple[List[Dict], Dict[str,int], List[Dict]]:
@@ -298,7 +464,7 @@ def summarize_changes(old_by_id: Dict[str, Dict], new_by_id: Dict[str, Dict]) ->
                 "sec_id": sid, "title": new["title"], "status": "Added",
                 "tags": categorize_change("", new["body"]),
                 "is_approp": bool(APPROPS_HINTS.search(new["body"])),
-                "redline": f"<ins>{esc(new['body'])}</ins>"
+                "redline": f"<ins>{new['body']}</ins>"
             })
             continue
 
@@ -390,21 +556,39 @@ JS = """
       cards.forEach(card => {
         const tags = (card.dataset.tags || '').split(',').filter(Boolean);
         const status = card.dataset.status || '';
-        const title = (card.dataset.title || '').toLowerCase();
-        const id = (card.id || '').toLowerCase();
 
         let ok = true;
         if (want.size) {
           ok = tags.some(t => want.has(t)) || want.has(status);
         }
         if (ok && text) {
-          ok = title.includes(text) || id.includes(text) || card.textContent.toLowerCase().includes(text);
+          // lowercase the card text once; keystrokes then do a plain includes()
+          if (card._searchText === undefined) {
+            card._searchText = ((card.dataset.title || '') + ' ' + card.id + ' ' + card.textContent).toLowerCase();
+          }
+          ok = card._searchText.includes(text);
         }
         if (ok && !showUnchanged && status === 'Unchanged') {
           ok = false;
         }
         card.style.display = ok ? '' : 'none';
       });
+      if (showUnchanged) hydrateUnchanged();
+    }
+
+    // unchanged bodies are not embedded in the page; pull them on first show
+    function hydrateUnchanged(){
+      const preset = document.body.dataset.preset;
+      qa("section.block[data-status='Unchanged']").forEach(card => {
+        if (card.style.display === 'none') return;
+        const pre = card.querySelector('pre');
+        if (!pre || pre.dataset.loaded) return;
+        pre.dataset.loaded = '1';
+        fetch('/section?preset=' + encodeURIComponent(preset) + '&sid=' + encodeURIComponent(card.dataset.sec))
+          .then(r => { if (!r.ok) throw new Error(r.status); return r.text(); })
+          .then(t => { pre.innerHTML = t; card._searchText = undefined; })  // body is pre-escaped server-side
+          .catch(() => { pre.textContent = '(section unavailable — reload the page)'; delete pre.dataset.loaded; });
+      });
     }
 
     btns.forEach(b => b.addEventListener('click', () => { b.classList.toggle('active'); apply(); }));
@@ -428,49 +612,65 @@ JS = """
 })();
 """
 
+# first <ins>/<del> in a redline gets the jump-target anchor; compiled once
+# (the old inline literal had a doubled backslash, so \\b matched a literal
+# backslash, the pattern never hit, and the top-5 #-chg links dangled)
+_INS_DEL_RE = re.compile(r"<(ins|del)\b")
+
 def build_html(label: str, stage_a: str, stage_b: str, changes, stats, unchanged, preset_key: str) -> str:
     now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
 
     def first_anchor(sec_id: str, redline_html: str):
         anchor_id = f"{sec_id}-chg"
-        m = re.search(r"<(ins|del)\\b", redline_html)
-        if not m: return sec_id, redline_html
-        return anchor_id, re.sub(r"<(ins|del)\\b", f'<a id="{anchor_id}"></a><\\1', redline_html, count=1)
-
-    nav_items, blocks = [], []
+        if not _INS_DEL_RE.search(redline_html):
+            return sec_id, redline_html
+        return anchor_id, _INS_DEL_RE.sub(f'<a id="{anchor_id}"></a><\\1', redline_html, count=1)
+
+    # stream fragments into two buffers (nav is emitted before main in the
+    # document) instead of accumulating per-section f-strings in lists
+    nav_buf, block_buf = io.StringIO(), io.StringIO()
+    nw, bw = nav_buf.write, block_buf.write
     for ch in changes:
         anchor_id, body_html = first_anchor(ch["sec_id"], ch["redline"])
-        tags = " ".join(f"<span class='chip tag'>{t}</span>" for t in ch["tags"])
-        app  = "<span class='chip approp'>Appropriations</span>" if ch["is_approp"] else ""
-        nav_items.append(
-            f"<a class='toc-link' href='#{esc(anchor_id)}'>"
-            f"<span class='chip status {ch['status']}'>{ch['status']}</span> "
-            f"<strong>{esc(ch['sec_id'])}</strong>"
-            f"<span class='sub'>{esc(ch['title'][:100])}</span></a>"
-        )
-        blocks.append(
-            f"<section class='block' id='{esc(ch['sec_id'])}' "
-            f"data-status='{ch['status']}' data-tags='{','.join(ch['tags'])}' data-title='{esc(ch['title'])}'>"
-            f"<h3>{esc(ch['title'])}</h3>"
-            f"<div>{app} <span class='chip status {ch['status']}'>{ch['status']}</span> {tags}</div>"
-            f"<pre>{body_html}</pre>"
-            f"</section>"
-        )
-
+        status = ch["status"]
+        title_esc = ch["title"]  # corpus text is pre-escaped by sanitize_text
+        nw("<a class='toc-link' href='#"); nw(anchor_id); nw("'>")
+        nw(f"<span class='chip status {status}'>{status}</span> ")
+        nw("<strong>"); nw(ch["sec_id"]); nw("</strong>")
+        nw("<span class='sub'>"); nw(crop_escaped(ch["title"], 100)); nw("</span></a>")
+
+        bw("<section class='block' id='"); bw(ch["sec_id"]); bw("' ")
+        bw(f"data-status='{status}' data-tags='{','.join(ch['tags'])}' data-title='{title_esc}'>")
+        bw("<h3>"); bw(title_esc); bw("</h3>")
+        bw("<div>")
+        if ch["is_approp"]:
+            bw("<span class='chip approp'>Appropriations</span>")
+        bw(f" <span class='chip status {status}'>{status}</span> ")
+        for t in ch["tags"]:
+            bw(f"<span class='chip tag'>{t}</span> ")
+        bw("</div>")
+        bw("<pre>"); bw(body_html); bw("</pre>")
+        bw("</section>")
+
+    # unchanged sections ship as metadata stubs; bodies are fetched lazily
+    # from /section when the user toggles them on
     for u in unchanged:
-        blocks.append(
-            f"<section class='block' id='{esc(u['sec_id'])}' "
-            f"data-status='Unchanged' data-tags='' data-title='{esc(u['title'])}' style='display:none;'>"
-            f"<h3>{esc(u['title'])}</h3>"
-            f"<div><span class='chip'>Unchanged</span></div>"
-            f"<pre>{esc(u['body'])}</pre>"
-            f"</section>"
-        )
+        bw("<section class='block' id='"); bw(u["sec_id"]); bw("' ")
+        bw("data-status='Unchanged' data-tags='' data-sec='"); bw(u["sec_id"])
+        bw("' data-title='"); bw(u["title"])
+        bw("' style='display:none;'>")
+        bw("<h3>"); bw(u["title"]); bw("</h3>")
+        bw("<div><span class='chip'>Unchanged</span></div>")
+        bw("<pre></pre>")
+        bw("</section>")
+
+    nav_items = nav_buf.getvalue()
+    blocks = block_buf.getvalue()
 
     top5 = [c for c in changes if c['is_approp']][:5]
     top5_html = "".join(
-        f"<li><a href='#{esc(c['sec_id'] + '-chg')}'>{esc(c['sec_id'])}</a> — "
-        f"{esc(c['title'][:140])} <span class='chip status {c['status']}'>{c['status']}</span></li>"
+        f"<li><a href='#{c['sec_id'] + '-chg'}'>{c['sec_id']}</a> — "
+        f"{crop_escaped(c['title'], 140)} <span class='chip status {c['status']}'>{c['status']}</span></li>"
         for c in top5
     ) or "<li>No likely funding changes found.</li>"
 
@@ -505,7 +705,7 @@ def build_html(label: str, stage_a: str, stage_b: str, changes, stats, unchanged
   <meta name="viewport" content="width=device-width, initial-scale=1" />
   <style>{CSS}</style>
 </head>
-<body>
+<body data-preset="{esc(preset_key)}">
 <header>
   <div class="toolbar">
     <select id="bill-switch">{options}</select>
@@ -527,16 +727,42 @@ def build_html(label: str, stage_a: str, stage_b: str, changes, stats, unchanged
 <div class="wrap">
   <nav>
     {controls}
-    {"".join(nav_items) if nav_items else "<em class='empty'>No changed sections detected.</em>"}
+    {nav_items if nav_items else "<em class='empty'>No changed sections detected.</em>"}
   </nav>
   <main>
-    {"".join(blocks) if blocks else "<p class='empty'>No changed sections to display.</p>"}
+    {blocks if blocks else "<p class='empty'>No changed sections to display.</p>"}
   </main>
 </div>
 <script>{JS}</script>
 </body>
 </html>"""
 
+def _html_response(gz: bytes, etag: str) -> Response:
+    # conditional refresh: matching If-None-Match skips the body entirely
+    if request.headers.get("If-None-Match") == etag:
+        return Response("", 304, {"ETag": etag})
+    common = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    # cache holds gzip bytes; serve them as-is when the client can take gzip
+    # (essentially all browsers), decompress only for the odd client that can't
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        return Response(gz, headers={
+            "Content-Encoding": "gzip",
+            "Content-Type": "text/html; charset=utf-8",
+            "Vary": "Accept-Encoding",
+            **common,
+        })
+    return Response(gzip.decompress(gz), content_type="text/html; charset=utf-8",
+                    headers=common)
+
+def _summarize_preset(cfg, fresh: bool = False) -> Tuple[List[Dict], Dict[str, int], List[Dict]]:
+    # both versions are independent network fetches; overlap them
+    # (cheap when VERSION_CACHE is warm in this worker)
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f1 = ex.submit(get_sections, cfg["congress"], cfg["chamber"], cfg["number"], cfg["v1"], fresh)
+        f2 = ex.submit(get_sections, cfg["congress"], cfg["chamber"], cfg["number"], cfg["v2"], fresh)
+        s1, s2 = f1.result(), f2.result()
+    return summarize_changes(index_by_id(s1), index_by_id(s2))
+
 # routes
 @app.get("/")
 def index():
@@ -553,31 +779,43 @@ def view():
         abort(400, "bad preset")
 
     if (not nocache) and preset_key in CACHE:
-        ts, html_doc = CACHE[preset_key]
+        ts, gz, etag = CACHE[preset_key]
         if (time.time() - ts) < CACHE_TTL:
-            return html_doc
+            return _html_response(gz, etag)
 
     cfg = PRESETS[preset_key]
-    stage_map = {
-        "ih":"Introduced (IH)", "rh":"Reported (RH)",
-        "eh":"Engrossed (EH)",  "enr":"Enrolled (ENR)"
-    }
     label   = cfg["label"]
-    stage_a = stage_map.get(cfg["v1"].lower(), cfg["v1"].upper())
-    stage_b = stage_map.get(cfg["v2"].lower(), cfg["v2"].upper())
-
-    v1 = fetch_version(cfg["congress"], cfg["chamber"], cfg["number"], cfg["v1"])
-    v2 = fetch_version(cfg["congress"], cfg["chamber"], cfg["number"], cfg["v2"])
+    stage_a = cfg["stage_a"]
+    stage_b = cfg["stage_b"]
 
-    v1c, v2c = sanitize_text(v1), sanitize_text(v2)
-    s1 = split_sections(v1c)
-    s2 = split_sections(v2c)
-    d1, d2 = index_by_id(s1), index_by_id(s2)
-    changes, stats, unchanged = summarize_changes(d1, d2)
+    # nocache means "really refetch": bypass the parsed-section cache too,
+    # not just the rendered page
+    changes, stats, unchanged = _summarize_preset(cfg, fresh=nocache)
+    UNCHANGED_CACHE[preset_key] = {u["sec_id"]: u["body"] for u in unchanged}
 
     html_doc = build_html(label, stage_a, stage_b, changes, stats, unchanged, preset_key)
-    CACHE[preset_key] = (time.time(), html_doc)
-    return html_doc
+    gz = gzip.compress(html_doc.encode("utf-8"), compresslevel=6)
+    etag = hashlib.blake2b(gz, digest_size=16).hexdigest()
+    CACHE[preset_key] = (time.time(), gz, etag)
+    return _html_response(gz, etag)
+
+@app.get("/section")
+def section():
+    preset_key = request.args.get("preset")
+    sid = request.args.get("sid", "")
+    if preset_key not in PRESETS:
+        abort(400, "bad preset")
+    bodies = UNCHANGED_CACHE.get(preset_key)
+    if bodies is None:
+        # this worker never rendered the preset (gunicorn round-robins the
+        # hydration fetches); rebuild the map instead of 404ing forever
+        _, _, unchanged = _summarize_preset(PRESETS[preset_key])
+        bodies = {u["sec_id"]: u["body"] for u in unchanged}
+        UNCHANGED_CACHE[preset_key] = bodies
+    body = bodies.get(sid)
+    if body is None:
+        abort(404, "unknown section")
+    return Response(body, content_type="text/plain; charset=utf-8")
 
 
 if __name__ == "__main__":
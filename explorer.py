@@ -1,6 +1,17 @@
 # Build a static comparison page from data/bill_v1.txt and data/bill_v2.txt to output/index.html
 
-import re, html, difflib, datetime, json
+import functools, hashlib, io, mmap, os, re, html, difflib, datetime, json, pickle
+from collections import Counter
+
+# optional C++-accelerated opcode computation for the redline diff (Myers
+# bit-parallel editops instead of difflib's quadratic matching); the
+# difflib path below remains the fallback
+try:
+    from rapidfuzz.distance import Levenshtein as _Levenshtein
+except ImportError:
+    _Levenshtein = None
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Dict, Tuple
 
@@ -32,189 +43,548 @@ if meta_path.exists():
         pass
 
 # text cleanup & normalization
+# every pattern below runs on multi-KB (or whole-bill) strings, often once per
+# section — compile them once at import instead of per call
+_RE_WS           = re.compile(r"[ \t]+")
+_RE_MULTI_NL     = re.compile(r"\n{3,}")
+_RE_THOUSANDS    = re.compile(r'\b(\d{1,3})(,\d{3})+\b')
+
+# bare-\r and non-breaking-space fixes in one C-level translate pass
+# (\r\n is collapsed by a plain replace first so it maps to one newline)
+_PRE_TABLE = str.maketrans({"\r": "\n", "\u00A0": " "})
+
+# whitespace collapse plus the punctuation/bracket spacing fixes fused into
+# one alternation, so the text is rewritten in a single pass instead of
+# three. The punctuation branch starts with [ \t]\s* rather than the
+# post-collapse " \s*" form so it composes with the collapse it now runs
+# alongside; the \s+-before-bracket branches must precede the plain [ \t]+
+# branch or the collapse would eat their leading whitespace.
+_CLEAN_RE = re.compile(r"[ \t]\s*([,.;:])|\(\s+|\[\s+|\s+\)|\s+\]|[ \t]+")
+
+def _clean_repl(m: re.Match) -> str:
+    p = m.group(1)
+    if p is not None:
+        return p
+    g = m.group(0)
+    if g[0] in "([":
+        return g[0]
+    if g[-1] in ")]":
+        return g[-1]
+    return " "
+
+# line stitching without the per-line interpreter loop: strip whitespace
+# at line edges ([^\S\n] is "whitespace except newline", matching what
+# str.strip removed), then join a newline to the following line unless
+# the previous line already ends a clause with . ; : or a closing paren.
+# Blank lines keep both newlines because the lookarounds refuse \n.
+_EDGE_WS_RE = re.compile(r"(?m)^[^\S\n]+|[^\S\n]+$")
+_JOIN_NL_RE = re.compile(r"(?<=[^\n.;:)])\n(?=[^\n])")
+
+# typographic cleanup done in one C-level translate pass instead of nine
+# chained str.replace copies of the whole text
+_NORM_TABLE = str.maketrans({
+    "“": '"', "”": '"', "’": "'", "‘": "'",
+    "—": "-", "–": "-", "·": "*",
+    "§": "Section ", "\u2009": " ", "\u202f": " ",
+})
+_RE_SPACE_PUNCT  = re.compile(r"\s+([,.;:])")
+_RE_WORDS        = re.compile(r'[^\w$]+')
+
 def sanitize_text(s: str) -> str:
-    s = s.replace("\r\n","\n").replace("\r","\n").replace("\u00A0"," ")
-    s = re.sub(r"[ \t]+"," ",s)
-    s = re.sub(r" \s*([,.;:])", r"\1", s)
-    s = re.sub(r"\(\s+","(",s); s = re.sub(r"\s+\)",")",s)
-    s = re.sub(r"\[\s+","[",s); s = re.sub(r"\s+\]","]",s)
-    out, buf = [], []
-    for ln in s.split("\n"):
-        t = ln.strip()
-        if not t:
-            if buf: out.append(" ".join(buf)); buf=[]
-            out.append(""); continue
-        buf.append(t)
-        if re.search(r"[.;:)]\s*$", t):
-            out.append(" ".join(buf)); buf=[]
-    if buf: out.append(" ".join(buf))
-    s = "\n".join(out)
-    s = re.sub(r"\n{3,}","\n\n", s).strip()
+    s = s.replace("\r\n","\n").translate(_PRE_TABLE)
+    s = _CLEAN_RE.sub(_clean_repl, s)
+    s = _EDGE_WS_RE.sub("", s)
+    s = _JOIN_NL_RE.sub(" ", s)
+    s = _RE_MULTI_NL.sub("\n\n", s).strip()
     return s
 
+# summarize_changes normalizes the same body up to three times (cosmetic
+# check, magnitude gate, final redline); memoize so each distinct body pays
+# the regex cascade once. A plain dict keyed by the string itself beats both
+# lru_cache (no wrapper call or bookkeeping per hit) and a hash(x)-keyed dict
+# (which would silently conflate colliding bodies) — dict lookup hashes the
+# key once and only falls back to equality on collision.
+_NORM_CACHE: Dict[str, str] = {}
+
 def normalize_for_diff(s: str) -> str:
+    v = _NORM_CACHE.get(s)
+    if v is None:
+        v = _NORM_CACHE[s] = _normalize_uncached(s)
+    return v
+
+def _normalize_uncached(s: str) -> str:
     s = sanitize_text(s)
-    s = (s.replace("“", '"').replace("”", '"')
-           .replace("’", "'").replace("‘", "'")
-           .replace("—", "-").replace("–", "-").replace("·", "*"))
-    s = s.replace("§","Section ").replace("\u2009"," ").replace("\u202f"," ")
-    s = re.sub(r'\b(\d{1,3})(,\d{3})+\b', lambda m: m.group(0).replace(',', ''), s)
-    s = re.sub(r"[ \t]+"," ", s)
-    s = re.sub(r"\s+([,.;:])", r"\1", s)
+    s = s.translate(_NORM_TABLE)
+    s = _RE_THOUSANDS.sub(lambda m: m.group(0).replace(',', ''), s)
+    s = _RE_WS.sub(" ", s)
+    s = _RE_SPACE_PUNCT.sub(r"\1", s)
     return s.strip()
 
 def is_cosmetic_change(a: str, b: str) -> bool:
-    a2 = re.sub(r'[^\w$]+','', normalize_for_diff(a).lower())
-    b2 = re.sub(r'[^\w$]+','', normalize_for_diff(b).lower())
+    a2 = _RE_WORDS.sub('', normalize_for_diff(a).lower())
+    b2 = _RE_WORDS.sub('', normalize_for_diff(b).lower())
     return a2 == b2
 
+# newline canonicalization and space/tab collapse as one bytes pass: \r\n?
+# is tried before [ \t]+ at each position, so both replace chains fold into
+# a single rewrite producing one output allocation
+_PRE_BYTES_RE = re.compile(rb"\r\n?|[ \t]+")
+
+def _pre_bytes_repl(m: re.Match) -> bytes:
+    return b"\n" if m.group(0)[0] == 0x0D else b" "
+
+# sanitized-text cache: one file per input, keyed by (mtime_ns, size) in the
+# name so a changed input simply misses. Sits beneath the parsed-section
+# cache and pays off when that one is cold (FORCE_FULLTEXT runs, deleted
+# output dir) without re-running the sanitize cascade.
+_TEXT_CACHE_DIR = OUTPUT_DIR / ".cache"
+
 def load_text(path: Path) -> str:
-    return sanitize_text(path.read_text(encoding="utf-8", errors="ignore"))
+    st = path.stat()
+    cache_file = _TEXT_CACHE_DIR / f"{path.name}.{st.st_mtime_ns}.{st.st_size}.txt"
+    try:
+        return cache_file.read_text(encoding="utf-8")
+    except OSError:
+        pass
+    # run the whole-file newline fixes and space/tab collapse on bytes —
+    # half the memory traffic of str for this ASCII-dominant text. UTF-8
+    # continuation bytes can never equal 0x0D/0x20/0x09, so the byte-level
+    # rewrite is codepoint-safe. The regex scans the mmap directly (the
+    # buffer protocol lets re read the page cache in place), so the fused
+    # sub's output is the only whole-file copy made before decoding.
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):  # empty file, or fs without mmap
+            buf = f.read()
+        data = _PRE_BYTES_RE.sub(_pre_bytes_repl, buf)
+        if buf.__class__ is mmap.mmap:
+            buf.close()
+    text = sanitize_text(data.decode("utf-8", errors="ignore"))
+    try:
+        _TEXT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for stale in _TEXT_CACHE_DIR.glob(f"{path.name}.*.txt"):
+            stale.unlink()
+        tmp = cache_file.with_suffix(".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(cache_file)
+    except Exception:
+        pass  # best-effort, like the section cache
+    return text
 
 # structure detection 
-SEC_RE       = re.compile(r'^(?:SEC\.|Sec\.|SECTION|Section)\s+(\d+[A-Za-z\-]*)[.: ]', re.MULTILINE)
-TITLE_RE     = re.compile(r'^(?:TITLE\s+[IVXLC]+(?:\s*[\u2014—-].*)?)$', re.MULTILINE)
-DIVISION_RE  = re.compile(r'^(?:DIVISION\s+[A-Z](?:\s*[\u2014—-].*)?)$', re.MULTILINE)
-SUBTITLE_RE  = re.compile(r'^(?:SUBTITLE\s+[A-Z](?:\s*[\u2014—-].*)?)$', re.MULTILINE)
+# one alternation over all four header shapes so the bill text is scanned
+# once; matches are bucketed by which named group fired and the existing
+# priority (sections, then divisions/titles/subtitles) applies afterwards
+_STRUCT_RE = re.compile(
+    r'^(?:(?P<sec>(?:SEC\.|Sec\.|SECTION|Section)\s+(?P<secnum>\d+[A-Za-z\-]*)[.: ])'
+    r'|(?P<div>DIVISION\s+[A-Z](?:\s*[\u2014—-].*)?$)'
+    r'|(?P<title>TITLE\s+[IVXLC]+(?:\s*[\u2014—-].*)?$)'
+    r'|(?P<sub>SUBTITLE\s+[A-Z](?:\s*[\u2014—-].*)?$))', re.MULTILINE)
+_SEC_HEAD_RE = re.compile(r'^(?:SEC\.|Sec\.|SECTION|Section)\s+\d+[A-Za-z\-]*[.: ]\s*(.*)$')
+# fallback granularity when no section headers match, in priority order
+_FALLBACK_LEVELS = (("div", "DIV"), ("title", "TITLE"), ("sub", "SUB"))
 
 def _split_by_matches(raw: str, matches: List[re.Match], id_prefix: str) -> List[Dict]:
+    # slice the body straight from match offsets — the old chunk/strip/re-slice
+    # dance copied each multi-KB block three times per section
     blocks = []
     for i, m in enumerate(matches):
-        start = m.start()
-        end   = matches[i+1].start() if i+1 < len(matches) else len(raw)
-        header = m.group(0).strip()
-        chunk  = raw[start:end].strip()
-        sec_id = f"{id_prefix}{i+1:03d}"
-        title  = header
-        body   = chunk[len(header):].strip()
-        blocks.append({"sec_id": sec_id, "title": title, "body": body})
+        end = matches[i+1].start() if i+1 < len(matches) else len(raw)
+        body = raw[m.end():end].strip()
+        blocks.append({"sec_id": f"{id_prefix}{i+1:03d}",
+                       "title": m.group(0).strip(),
+                       "body": body, "fp_raw": _fp(body)})
     return blocks
 
 def split_sections(raw: str) -> List[Dict]:
-    sec = list(SEC_RE.finditer(raw))
+    buckets: Dict[str, List[re.Match]] = {"sec": [], "div": [], "title": [], "sub": []}
+    for m in _STRUCT_RE.finditer(raw):
+        if m.group("sec") is not None: buckets["sec"].append(m)
+        elif m.group("div") is not None: buckets["div"].append(m)
+        elif m.group("title") is not None: buckets["title"].append(m)
+        else: buckets["sub"].append(m)
+
+    sec = buckets["sec"]
     if sec and len(sec) <= MAX_SEC_MATCHES:
         out = []
         for i, m in enumerate(sec):
-            sid   = m.group(1)
+            sid   = m.group("secnum")
             start = m.start()
             end   = sec[i+1].start() if i+1 < len(sec) else len(raw)
-            block = raw[start:end].strip()
-            head  = block.split("\n", 1)[0]
-            m2 = re.search(r'^(?:SEC\.|Sec\.|SECTION|Section)\s+\d+[A-Za-z\-]*[.: ]\s*(.*)$', head)
-            title = (m2.group(1).strip() if m2 else head) or f"Section {sid}"
-            body  = block[len(head):].strip()
-            out.append({"sec_id": sid, "title": title, "body": body})
+            # the header is everything up to the first newline; locate it by
+            # offset instead of copying and stripping the whole block first
+            nl    = raw.find("\n", start, end)
+            head_end = nl if nl != -1 else end
+            head  = raw[start:head_end]
+            m2 = _SEC_HEAD_RE.search(head)
+            title = (m2.group(1).strip() if m2 else head.strip()) or f"Section {sid}"
+            body  = raw[head_end:end].strip()
+            out.append({"sec_id": sid, "title": title, "body": body, "fp_raw": _fp(body)})
         return out
-    for rx, pref in [(DIVISION_RE, "DIV"), (TITLE_RE, "TITLE"), (SUBTITLE_RE, "SUB")]:
-        m = list(rx.finditer(raw))
-        if m: return _split_by_matches(raw, m, pref)
-    return [{"sec_id":"ALL", "title":"FULL TEXT", "body":raw.strip()}]
+    for key, pref in _FALLBACK_LEVELS:
+        if buckets[key]: return _split_by_matches(raw, buckets[key], pref)
+    body = raw.strip()
+    return [{"sec_id":"ALL", "title":"FULL TEXT", "body":body, "fp_raw": _fp(body)}]
+
+def _fp(s: str) -> bytes:
+    return hashlib.blake2b(s.encode("utf-8"), digest_size=16).digest()
+
+def _fp_raw(sec: Dict) -> bytes:
+    v = sec.get("fp_raw")
+    if v is None:
+        v = sec["fp_raw"] = _fp(sec["body"])
+    return v
+
+def _fp_cos(sec: Dict) -> bytes:
+    # fingerprint of the cosmetic-equivalence key (normalized, lowered,
+    # non-word chars removed) so the fingerprint test matches
+    # is_cosmetic_change exactly; hashing plain normalize_for_diff output
+    # would miss case- and punctuation-only differences the old check
+    # treated as cosmetic
+    v = sec.get("fp_cos")
+    if v is None:
+        v = sec["fp_cos"] = _fp(_RE_WORDS.sub('', normalize_for_diff(sec["body"]).lower()))
+    return v
 
 def index_by_id(sections: List[Dict]) -> Dict[str, Dict]:
     return {s["sec_id"]: s for s in sections}
 
 # diffing
 TOKEN_RE = re.compile(r"\S+|\s+")
+# any whitespace that isn't a lone space ([^ \S] = whitespace except space,
+# or two spaces in a row) — if absent, the text is single-space separated
+_NOT_SINGLE_SPACED = re.compile(r"[^ \S]|  ")
+
+@functools.lru_cache(maxsize=1024)
+def _tokens(s: str) -> List[str]:
+    # shared by diff_magnitude and diff_words_preserve_ws; callers must not
+    # mutate the returned list. Normalized bodies are usually single-space
+    # separated, so their token list — words strictly alternating with
+    # single spaces — can be rebuilt from a C-level split plus one slice
+    # assignment; only multi-paragraph or oddly spaced text pays for the
+    # regex findall. Both paths yield the identical list, so diff output
+    # doesn't depend on which one ran.
+    if s and s[0] != " " and s[-1] != " " and not _NOT_SINGLE_SPACED.search(s):
+        words = s.split(" ")
+        toks: List[str] = [" "] * (2 * len(words) - 1)
+        toks[::2] = words
+        return toks
+    return TOKEN_RE.findall(s)
+
 def esc(s: str) -> str: return html.escape(s, quote=False)
 
-def diff_words_preserve_ws(a: str, b: str) -> str:
-    a_tok = TOKEN_RE.findall(a)
-    b_tok = TOKEN_RE.findall(b)
-    sm = difflib.SequenceMatcher(a=a_tok, b=b_tok)
-    out = []
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
-        A = "".join(a_tok[i1:i2]); B = "".join(b_tok[j1:j2])
-        if tag == "equal": out.append(esc(A))
-        elif tag == "delete": out.append(f"<del>{esc(A)}</del>")
-        elif tag == "insert": out.append(f"<ins>{esc(B)}</ins>")
-        else: out.append(f"<del>{esc(A)}</del><ins>{esc(B)}</ins>")
+def _intern_pair(a_tok: List[str], b_tok: List[str]) -> Tuple[List[int], List[int]]:
+    # map both token lists through one vocab so SequenceMatcher's inner
+    # loops compare and hash small ints instead of dispatching string
+    # rich-comparisons; ids are positional stand-ins, so opcode indices
+    # still address the original lists
+    vocab: Dict[str, int] = {}
+    setd = vocab.setdefault
+    return ([setd(t, len(vocab)) for t in a_tok],
+            [setd(t, len(vocab)) for t in b_tok])
+
+def diff_words_preserve_ws(a: str, b: str, anchor_id: str | None = None) -> str:
+    # anchor_id, when given, is emitted as an empty <a> immediately before
+    # the first changed span, so nav links can jump straight to the edit
+    if a == b:
+        return esc(a)
+    a_tok = _tokens(a)
+    b_tok = _tokens(b)
+    la, lb = len(a_tok), len(b_tok)
+    # versions mostly share their opening and closing text; strip the common
+    # token runs so the quadratic matcher only sees the differing interior
+    p = 0
+    limit = min(la, lb)
+    while p < limit and a_tok[p] == b_tok[p]:
+        p += 1
+    q = 0
+    limit -= p
+    while q < limit and a_tok[la - 1 - q] == b_tok[lb - 1 - q]:
+        q += 1
+    a_ids, b_ids = _intern_pair(a_tok[p:la - q], b_tok[p:lb - q])
+    if _Levenshtein is not None:
+        opcodes = [(op.tag, op.src_start, op.src_end, op.dest_start, op.dest_end)
+                   for op in _Levenshtein.opcodes(a_ids, b_ids)]
+    else:
+        # autojunk would silently treat popular tokens ("the", "shall",
+        # single spaces) as junk once a side exceeds 200 tokens, producing
+        # degenerate redlines on exactly the long sections that matter
+        opcodes = difflib.SequenceMatcher(a=a_ids, b=b_ids, autojunk=False).get_opcodes()
+    # escape each token once up front; opcode ranges then join pre-escaped
+    # slices instead of calling html.escape per opcode boundary
+    a_esc = [esc(t) for t in a_tok]
+    b_esc = [esc(t) for t in b_tok]
+    out = ["".join(a_esc[:p])]
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            out.append("".join(a_esc[p + i1:p + i2]))
+            continue
+        if anchor_id is not None:
+            out.append(f'<a id="{anchor_id}"></a>')
+            anchor_id = None
+        if tag == "delete": out.append(f"<del>{''.join(a_esc[p + i1:p + i2])}</del>")
+        elif tag == "insert": out.append(f"<ins>{''.join(b_esc[p + j1:p + j2])}</ins>")
+        else: out.append(f"<del>{''.join(a_esc[p + i1:p + i2])}</del><ins>{''.join(b_esc[p + j1:p + j2])}</ins>")
+    if q:
+        out.append("".join(a_esc[la - q:]))
     return "".join(out)
 
 def diff_magnitude(a: str, b: str) -> Tuple[int, float]:
-    a2 = normalize_for_diff(a)
-    b2 = normalize_for_diff(b)
-    a_tok = TOKEN_RE.findall(a2)
-    b_tok = TOKEN_RE.findall(b2)
-    sm = difflib.SequenceMatcher(a=a_tok, b=b_tok)
+    return _diff_magnitude_norm(normalize_for_diff(a), normalize_for_diff(b))
+
+def _diff_magnitude_norm(a2: str, b2: str) -> Tuple[int, float]:
+    # same contract as diff_magnitude but takes already-normalized text
+    if a2 == b2:
+        return 0, 1.0
+    # cheap multiset gate before the quadratic SequenceMatcher, computed
+    # from C-level str.split() words without materializing TOKEN_RE lists.
+    # Normalized text is stripped, so TOKEN_RE tokens strictly alternate
+    # word/whitespace: a text with W words has exactly 2W-1 tokens, at most
+    # W-1 of them whitespace. Matched tokens are therefore bounded by the
+    # word-multiset intersection plus min(W_a, W_b)-1 whitespace matches,
+    # giving an upper bound on ratio and a lower bound on changed tokens.
+    # When those bounds already decide the caller's MIN_DIFF_TOKENS /
+    # MIN_EQUAL_RATIO test, skip the real diff entirely.
+    a_words = a2.split()
+    b_words = b2.split()
+    wa, wb = len(a_words), len(b_words)
+    if wa and wb:
+        inter = sum((Counter(a_words) & Counter(b_words)).values())
+        total = (2 * wa - 1) + (2 * wb - 1)
+        matched_ub = inter + min(wa, wb) - 1
+        ratio_ub = 2.0 * matched_ub / total
+        changed_lb = total - 2 * matched_ub
+        if ratio_ub < MIN_EQUAL_RATIO and changed_lb >= MIN_DIFF_TOKENS:
+            return changed_lb, ratio_ub
+    a_ids, b_ids = _intern_pair(_tokens(a2), _tokens(b2))
+    # autojunk off for the same reason as the redline diff: popular words
+    # must count as matchable or long near-identical sections misclassify
+    sm = difflib.SequenceMatcher(a=a_ids, b=b_ids, autojunk=False)
     ratio = sm.ratio()
     changed_tokens = sum((i2-i1)+(j2-j1) for tag,i1,i2,j1,j2 in sm.get_opcodes() if tag!="equal")
     return changed_tokens, ratio
 
+# every APPROPS_HINTS alternative contains one of these case-folded
+# substrings, so a plain C-level `in` sweep can reject the (dominant)
+# non-appropriations bodies without entering the regex engine
+_CHEAP_HINTS = ("$", "ppropriat", "transfer", "obligation", "resciss",
+                "offset", "grant", "fund", "remain available")
+
 APPROPS_HINTS = re.compile(
     r'(\$\s?\d|\bappropriat(?:e|ion|ed|ions)\b|\bauthorized to be appropriated\b|'
     r'\btransfer\b|\bobligation\b|\bresciss|\boffset\b|\bgrant\b|\bfund(?:s|ing)?\b|'
     r'\bremain available\b)', re.IGNORECASE
 )
+
+def _maybe_approp(body: str) -> bool:
+    # substring pre-filter, then the real pattern only on plausible text
+    bl = body.lower()
+    return any(h in bl for h in _CHEAP_HINTS) and APPROPS_HINTS.search(bl) is not None
+# one combined scan instead of four: each match flips a tag via lastgroup.
+# The alternation sits inside a zero-width lookahead so a hit for one
+# category can't consume the start of an overlapping phrase from another
+# (e.g. 'may not' swallowing the 'not' of 'not later than'). The Approp
+# alternative carries the APPROPS_HINTS terms that don't share a start
+# position with a Funding term, so is_approp falls out of the same pass;
+# Funding positions are re-checked against APPROPS_HINTS anchored there
+# (the hint list is stricter about suffixes, e.g. 'funder' is Funding but
+# not an appropriations hint).
+_CAT_RE = re.compile(
+    r'(?=(?P<Funding>\$[\s]?\d|\bappropriat|\bauthorized to be appropriated|\bgrant\b|\bfund(?:s|ing)?)'
+    r'|(?P<Authority>\bshall\b|\bmay not\b|\bpenalt)'
+    r'|(?P<Reporting>not later than|\breport to congress|\bgao\b|\breporting requirement)'
+    r'|(?P<Approp>\btransfer\b|\bobligation\b|\bresciss|\boffset\b|\bremain available\b))')
+
+# fixed emission order for tag chips (matches the old sorted() output, so
+# data-tags attributes and chip order are stable without a per-call sort)
+_TAG_ORDER = ("Authority", "Funding", "Reporting")
+
+@functools.lru_cache(maxsize=1024)
+def _scan_tags(t: str) -> Tuple[List[str], bool]:
+    # t must already be lowercased; returns (ordered tags, is_approp).
+    # Pure function of its input, and boilerplate bodies repeat across
+    # sections and reruns — memoize so each distinct text is scanned once.
+    # Callers must not mutate the returned tag list.
+    tags = set()
+    approp = False
+    hint_at = APPROPS_HINTS.match
+    for m in _CAT_RE.finditer(t):
+        g = m.lastgroup
+        if g == "Approp":
+            approp = True
+        else:
+            tags.add(g)
+            if g == "Funding" and not approp and hint_at(t, m.start()):
+                approp = True
+        if approp and len(tags) == 3:
+            break
+    return [t for t in _TAG_ORDER if t in tags], approp
+
 def categorize_change(before: str, after: str) -> List[str]:
-    tags=set(); t=(before+" "+after).lower()
-    if re.search(r'(\$[\s]?\d|\bappropriat|\bauthorized to be appropriated|\bgrant\b|\bfund(?:s|ing)?)', t): tags.add("Funding")
-    if re.search(r'\bshall\b|\bmay not\b|\bpenalt', t): tags.add("Authority")
-    if re.search(r'not later than|\breport to congress|\bgao\b|\breporting requirement', t): tags.add("Reporting")
-    return sorted(tags)
+    return _scan_tags((before + " " + after).lower())[0]
 
 def build_renumber_map(old_sections: Dict[str, Dict], new_sections: Dict[str, Dict]) -> Dict[str, str]:
     old_ids = list(old_sections.keys())
     new_ids = list(new_sections.keys())
     if len(set(old_ids) & set(new_ids)) >= 0.5 * min(len(old_ids), len(new_ids)): return {}
+
+    # blocking step: shingle new titles into character 3-grams once, then
+    # score each old title only against the few candidates sharing grams,
+    # instead of running SequenceMatcher over every old×new pair
+    gram_index: Dict[str, set] = {}
+    titles: Dict[str, str] = {}
+    by_title: Dict[str, List[str]] = {}
+    for n_id, n in new_sections.items():
+        t = n.get("title") or ""
+        titles[n_id] = t
+        by_title.setdefault(t, []).append(n_id)
+        for i in range(len(t) - 2):
+            gram_index.setdefault(t[i:i+3], set()).add(n_id)
+
     mapping={}; used=set()
     for o_id,o in old_sections.items():
+        ot = o.get("title") or ""
+        # identical titles score 1.0 — map without touching difflib
+        exact = next((n_id for n_id in by_title.get(ot, []) if n_id not in used), None)
+        if ot and exact is not None:
+            mapping[o_id]=exact; used.add(exact); continue
+        votes: Counter = Counter()
+        for i in range(len(ot) - 2):
+            for n_id in gram_index.get(ot[i:i+3], ()):
+                if n_id not in used:
+                    votes[n_id] += 1
         best_id,best=None,0.0
-        for n_id,n in new_sections.items():
-            if n_id in used: continue
-            r=difflib.SequenceMatcher(None,(o.get("title") or ""), (n.get("title") or "")).ratio()
+        for n_id,_ in votes.most_common(5):
+            r=difflib.SequenceMatcher(None, ot, titles[n_id]).ratio()
             if r>best: best,best_id=r,n_id
         if best>=0.90:
             mapping[o_id]=best_id; used.add(best_id)
     return mapping
 
+def _diff_one(args: Tuple[str, str, str, str, str]) -> Tuple[Dict | None, Dict | None]:
+    # self-contained per-section diff job: returns (unchanged_entry, None)
+    # when the pair demotes to unchanged, else (None, change_dict). Module-
+    # level so ProcessPoolExecutor can pickle it.
+    sid, old_title, new_title, old_body, new_body = args
+    A = normalize_for_diff(old_body); B = normalize_for_diff(new_body)
+    changed_tokens, ratio = _diff_magnitude_norm(A, B)
+    if changed_tokens < MIN_DIFF_TOKENS or ratio >= MIN_EQUAL_RATIO:
+        return {"sec_id": sid, "title": new_title or old_title, "body": B}, None
+    # scan each side on its own instead of materializing A+" "+B just for
+    # the regex; two scans over the originals skip the concat allocation
+    # and make the memoized scan reusable per body. A multiword phrase
+    # straddling the old/new boundary can no longer match, but that seam
+    # was an artifact of the concatenation, not text from either version.
+    tags_a, ap_a = _scan_tags(A.lower())
+    tags_b, ap_b = _scan_tags(B.lower())
+    if tags_a == tags_b:
+        tags = tags_a
+    else:
+        both = set(tags_a); both.update(tags_b)
+        tags = [t for t in _TAG_ORDER if t in both]
+    return None, {"sec_id": sid, "title": (new_title or old_title), "status": "Modified",
+                  "tags": tags, "is_approp": ap_a or ap_b,
+                  "redline": diff_words_preserve_ws(A, B, f"{sid}-chg")}
+
+# below this many pending diffs, process startup + pickling costs more than
+# it saves — run them inline instead
+_MIN_PARALLEL_DIFFS = 4
+
 def summarize_changes(old_by_id: Dict[str, Dict], new_by_id: Dict[str, Dict]) -> Tuple[List[Dict], Dict[str,int], List[Dict]]:
     remap = build_renumber_map(old_by_id, new_by_id)
     if remap:
         new_by_id = { (next((k for k,v in remap.items() if v==sid), sid)) : sec for sid,sec in new_by_id.items() }
 
-    changes=[]; unchanged=[]
+    # bucket by is_approp at append time; the final ordering then needs two
+    # plain sec_id sorts (C-level itemgetter key) instead of one pass with a
+    # Python lambda computing (not is_approp, sec_id) per comparison
+    _approp=[]; _other=[]; unchanged=[]
+    pending=[]  # (args, placeholder index in unchanged) for sections needing a real diff
     stats={"added":0,"removed":0,"modified":0,"unchanged":0}
-    all_ids = sorted(set(old_by_id)|set(new_by_id), key=lambda x:(len(x),x))
+    get_old = old_by_id.get; get_new = new_by_id.get
+    # (length, lexicographic) order without a Python lambda key: sort
+    # lexicographically, then stable-sort by the C-implemented len. The two
+    # sorted key lists are then merge-walked, deduplicating shared ids —
+    # no set union, no per-comparison key tuple from interpreted code.
+    old_ids = sorted(old_by_id); old_ids.sort(key=len)
+    new_ids = sorted(new_by_id); new_ids.sort(key=len)
+    all_ids = []
+    i = j = 0; na, nb = len(old_ids), len(new_ids)
+    while i < na and j < nb:
+        a, b = old_ids[i], new_ids[j]
+        if a == b:
+            all_ids.append(a); i += 1; j += 1
+        elif (len(a), a) < (len(b), b):
+            all_ids.append(a); i += 1
+        else:
+            all_ids.append(b); j += 1
+    all_ids += old_ids[i:]
+    all_ids += new_ids[j:]
 
     for sid in all_ids:
-        old = old_by_id.get(sid); new = new_by_id.get(sid)
+        old = get_old(sid); new = get_new(sid)
 
         if old and not new:
             stats["removed"]+=1
-            changes.append({"sec_id":sid,"title":old["title"],"status":"Removed","tags":[],
-                            "is_approp":bool(APPROPS_HINTS.search(old["body"])),
-                            "redline":"<del>Section removed in newer version.</del>"})
+            ch={"sec_id":sid,"title":old["title"],"status":"Removed","tags":[],
+                "is_approp":_maybe_approp(old["body"]),
+                "redline":f'<a id="{sid}-chg"></a><del>Section removed in newer version.</del>'}
+            (_approp if ch["is_approp"] else _other).append(ch)
             continue
 
         if new and not old:
             stats["added"]+=1
-            changes.append({"sec_id":sid,"title":new["title"],"status":"Added",
-                            "tags":categorize_change("",new["body"]),
-                            "is_approp":bool(APPROPS_HINTS.search(new["body"])),
-                            "redline":f"<ins>{esc(new['body'])}</ins>"})
+            tags, is_approp = _scan_tags(new["body"].lower())
+            ch={"sec_id":sid,"title":new["title"],"status":"Added",
+                "tags":tags,"is_approp":is_approp,
+                "redline":f'<a id="{sid}-chg"></a><ins>{esc(new["body"])}</ins>'}
+            (_approp if ch["is_approp"] else _other).append(ch)
             continue
 
         if old and new:
-            A_raw=(old["body"] or "").strip(); B_raw=(new["body"] or "").strip()
-            if A_raw==B_raw:
-                stats["unchanged"]+=1
-                unchanged.append({"sec_id":sid,"title":new["title"] or old["title"],"body":B_raw}); continue
-            if is_cosmetic_change(A_raw,B_raw):
+            # 16-byte fingerprint compares instead of O(n) string equality;
+            # fp_raw is attached at split time (and rides along in the
+            # section cache), fp_cos lazily on first use. Bodies are always
+            # stripped by the split paths, so fp_raw equality matches the old
+            # stripped-body comparison.
+            if _fp_raw(old) == _fp_raw(new):
                 stats["unchanged"]+=1
-                unchanged.append({"sec_id":sid,"title":new["title"] or old["title"],"body":normalize_for_diff(B_raw)}); continue
-            changed_tokens,ratio = diff_magnitude(A_raw,B_raw)
-            if changed_tokens<MIN_DIFF_TOKENS or ratio>=MIN_EQUAL_RATIO:
+                unchanged.append({"sec_id":sid,"title":new["title"] or old["title"],"body":new["body"]}); continue
+            if _fp_cos(old) == _fp_cos(new):
                 stats["unchanged"]+=1
-                unchanged.append({"sec_id":sid,"title":new["title"] or old["title"],"body":normalize_for_diff(B_raw)}); continue
+                unchanged.append({"sec_id":sid,"title":new["title"] or old["title"],
+                                  "body":normalize_for_diff(new["body"])}); continue
+            # defer the expensive diff; a placeholder keeps the display slot
+            # in case the pair demotes to unchanged
+            unchanged.append(None)
+            pending.append(((sid, old["title"], new["title"], old["body"], new["body"]),
+                            len(unchanged) - 1))
+
+    # per-section diffs are independent once the remap is applied; farm them
+    # out across cores when there are enough to amortize process startup
+    if len(pending) >= _MIN_PARALLEL_DIFFS:
+        try:
+            workers = min(os.cpu_count() or 1, len(pending))
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                results = list(ex.map(_diff_one, [p[0] for p in pending], chunksize=8))
+        except Exception:
+            results = [_diff_one(p[0]) for p in pending]
+    else:
+        results = [_diff_one(p[0]) for p in pending]
+
+    for (_, slot), (demoted, ch) in zip(pending, results):
+        if demoted is not None:
+            stats["unchanged"]+=1
+            unchanged[slot] = demoted
+        else:
             stats["modified"]+=1
-            A=normalize_for_diff(A_raw); B=normalize_for_diff(B_raw)
-            changes.append({"sec_id":sid,"title":(new["title"] or old["title"]),"status":"Modified",
-                            "tags":categorize_change(A,B),
-                            "is_approp":bool(APPROPS_HINTS.search(A+" "+B)),
-                            "redline":diff_words_preserve_ws(A,B)})
+            (_approp if ch["is_approp"] else _other).append(ch)
+    unchanged = [u for u in unchanged if u is not None]
 
-    changes.sort(key=lambda x:(not x["is_approp"], x["sec_id"]))
-    return changes, stats, unchanged
+    _approp.sort(key=itemgetter("sec_id"))
+    _other.sort(key=itemgetter("sec_id"))
+    return _approp + _other, stats, unchanged
 
 # HTML (same UX as app.py)
 CSS = """
@@ -316,67 +686,46 @@ JS = """
 })();
 """
 
-def build_html(change_log: List[Dict], stats: Dict[str,int], unchanged: List[Dict]) -> str:
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-
-    def first_change_anchor(sec_id: str, redline_html: str):
-        anchor_id = f"{sec_id}-chg"
-        m = re.search(r"<(ins|del)\\b", redline_html)
-        if not m: return sec_id, redline_html
-        new_html = re.sub(r"<(ins|del)\\b", f'<a id="{anchor_id}"></a><\\1', redline_html, count=1)
-        return anchor_id, new_html
-
-    nav_items, blocks = [], []
-
-    for ch in change_log:
-        anchor_id, body_html = first_change_anchor(ch["sec_id"], ch["redline"])
-        tags = " ".join(f"<span class='chip tag'>{t}</span>" for t in ch["tags"])
-        app  = "<span class='chip approp'>Appropriations</span>" if ch["is_approp"] else ""
-        nav_items.append(
-            f"<a class='toc-link' href='#{esc(anchor_id)}'>"
-            f"<span class='chip status {ch['status']}'>{ch['status']}</span> "
-            f"<strong>{esc(ch['sec_id'])}</strong>"
-            f"<span class='sub'>{esc(ch['title'][:100])}</span></a>"
-        )
-        blocks.append(
-            f"<section class='block' id='{esc(ch['sec_id'])}' "
-            f"data-status='{ch['status']}' data-tags='{','.join(ch['tags'])}' data-title='{esc(ch['title'])}'>"
-            f"<h3>{esc(ch['title'])}</h3>"
-            f"<div><span class='chip status {ch['status']}'>{ch['status']}</span> {app} {tags}</div>"
-            f"<div class='collapsible'>"
-            f"  <pre>{body_html}</pre>"
-            f"  <div class='row-actions'>"
-            f"    <button class='btn tiny toggle'>Expand</button>"
-            f"    <span class='muted'>Long sections are collapsed by default.</span>"
-            f"  </div>"
-            f"</div>"
-            f"</section>"
-        )
-
-    for u in unchanged:
-        blocks.append(
-            f"<section class='block' id='{esc(u['sec_id'])}' "
-            f"data-status='Unchanged' data-tags='' data-title='{esc(u['title'])}' style='display:none;'>"
-            f"<h3>{esc(u['title'])}</h3>"
-            f"<div><span class='chip'>Unchanged</span></div>"
-            f"<div class='collapsible'>"
-            f"  <pre>{esc(u['body'])}</pre>"
-            f"  <div class='row-actions'>"
-            f"    <button class='btn tiny toggle'>Expand</button>"
-            f"    <span class='muted'>Long sections are collapsed by default.</span>"
-            f"  </div>"
-            f"</div>"
-            f"</section>"
-        )
-
-    top5 = [c for c in change_log if c['is_approp']][:5]
-    top5_html = "".join(
-        f"<li><a href='#{esc(c['sec_id'] + '-chg')}'>{esc(c['sec_id'])}</a> — "
-        f"{esc(c['title'][:140])} <span class='chip status {c['status']}'>{c['status']}</span></li>"
-        for c in top5
-    ) or "<li>No likely funding changes found.</li>"
+_TAG_TMPL    = "<span class='chip tag'>%s</span>"
+_APPROP_CHIP = "<span class='chip approp'>Appropriations</span>"
+_NAV_TMPL = (
+    "<a class='toc-link' href='#{anchor}'>"
+    "<span class='chip status {status}'>{status}</span> "
+    "<strong>{sid}</strong>"
+    "<span class='sub'>{title100}</span></a>"
+)
+_BLOCK_TMPL = (
+    "<section class='block' id='{sid}' "
+    "data-status='{status}' data-tags='{tags_attr}' data-title='{title}'>"
+    "<h3>{title}</h3>"
+    "<div><span class='chip status {status}'>{status}</span> {app_chip} {tag_chips}</div>"
+    "<div class='collapsible'>"
+    "  <pre>{body}</pre>"
+    "  <div class='row-actions'>"
+    "    <button class='btn tiny toggle'>Expand</button>"
+    "    <span class='muted'>Long sections are collapsed by default.</span>"
+    "  </div>"
+    "</div>"
+    "</section>"
+)
+_UNCHANGED_TMPL = (
+    "<section class='block' id='{sid}' "
+    "data-status='Unchanged' data-tags='' data-title='{title}' style='display:none;'>"
+    "<h3>{title}</h3>"
+    "<div><span class='chip'>Unchanged</span></div>"
+    "<div class='collapsible'>"
+    "  <pre>{body}</pre>"
+    "  <div class='row-actions'>"
+    "    <button class='btn tiny toggle'>Expand</button>"
+    "    <span class='muted'>Long sections are collapsed by default.</span>"
+    "  </div>"
+    "</div>"
+    "</section>"
+)
 
-    controls = f"""
+# filter controls depend only on the module-level SHOW_UNCHANGED flag, so
+# the fragment is rendered once at import rather than per build
+_CONTROLS = f"""
       <div class="controls">
         <input id="search" type="text" placeholder="Filter by text, section id, or content…" />
         <button class="btn" data-filter="Modified">Modified</button>
@@ -391,7 +740,48 @@ def build_html(change_log: List[Dict], stats: Dict[str,int], unchanged: List[Dic
       </div>
     """
 
-    html_doc = f"""<!doctype html>
+def build_html(change_log: List[Dict], stats: Dict[str,int], unchanged: List[Dict], out=None) -> str | None:
+    # with `out` (any text-file-like object) the document is streamed into
+    # it and None is returned; the final page is then never materialized as
+    # one multi-MB string. Without `out` the page is returned as before.
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    # precompute one dict per section; the nav column and the main column
+    # each interpolate it into a constant template so the literal HTML
+    # fragments are never re-parsed per f-string. The <a id="...-chg">
+    # anchor is already embedded in the redline by summarize_changes, so
+    # nav links always target the first changed span directly.
+    rows = []
+    top5_idx = []
+    for i, ch in enumerate(change_log):
+        if ch["is_approp"] and len(top5_idx) < 5:
+            top5_idx.append(i)
+        sid_esc = esc(ch["sec_id"])
+        rows.append({
+            "sid": sid_esc,
+            "status": ch["status"],
+            "title": esc(ch["title"]),
+            "title100": esc(ch["title"][:100]),
+            "anchor": sid_esc + "-chg",
+            "tags_attr": ",".join(ch["tags"]),
+            "tag_chips": " ".join(_TAG_TMPL % t for t in ch["tags"]),
+            "app_chip": _APPROP_CHIP if ch["is_approp"] else "",
+            "body": ch["redline"],
+        })
+
+    controls = _CONTROLS
+    # the sec_id and status were escaped once into the row dicts above;
+    # only the longer 140-char title crop still needs its own escape
+    top5_html = "".join(
+        f"<li><a href='#{rows[i]['sid']}-chg'>{rows[i]['sid']}</a> — "
+        f"{esc(change_log[i]['title'][:140])} <span class='chip status {rows[i]['status']}'>{rows[i]['status']}</span></li>"
+        for i in top5_idx
+    ) or "<li>No likely funding changes found.</li>"
+
+
+    sink = io.StringIO() if out is None else out
+    w = sink.write
+    w(f"""<!doctype html>
 <html lang="en">
 <head>
 <meta charset="utf-8" />
@@ -418,37 +808,80 @@ def build_html(change_log: List[Dict], stats: Dict[str,int], unchanged: List[Dic
 <div class="wrap">
   <nav>
     {controls}
-    {"".join(nav_items) if nav_items else "<em class='empty'>No changed sections detected.</em>"}
+    """)
+    if rows:
+        for row in rows:
+            w(_NAV_TMPL.format_map(row))
+    else:
+        w("<em class='empty'>No changed sections detected.</em>")
+    w("""
   </nav>
   <main>
-    {"".join(blocks) if blocks else "<p class='empty'>No changed sections to display. Check your inputs.</p>"}
+    """)
+    if rows or unchanged:
+        for row in rows:
+            w(_BLOCK_TMPL.format_map(row))
+        for u in unchanged:
+            w(_UNCHANGED_TMPL.format_map({"sid": esc(u["sec_id"]),
+                                          "title": esc(u["title"]),
+                                          "body": esc(u["body"])}))
+    else:
+        w("<p class='empty'>No changed sections to display. Check your inputs.</p>")
+    w(f"""
   </main>
 </div>
 
 <script>{JS}</script>
 </body>
 </html>
-"""
-    return html_doc
+""")
+    return sink.getvalue() if out is None else None
+
+# parsed-section cache: sanitize+split of unchanged input files is identical
+# across runs, so persist the result keyed by each file's (mtime_ns, size)
+CACHE_PATH = OUTPUT_DIR / ".cache.pkl"
+
+def _load_section_cache(sig) -> Tuple[List[Dict], List[Dict]] | None:
+    try:
+        with open(CACHE_PATH, "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("sig") == sig:
+            return cached["s1"], cached["s2"]
+    except Exception:
+        pass
+    return None
+
+def _store_section_cache(sig, s1: List[Dict], s2: List[Dict]) -> None:
+    try:
+        tmp = CACHE_PATH.with_suffix(".pkl.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump({"sig": sig, "s1": s1, "s2": s2}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(CACHE_PATH)
+    except Exception:
+        pass  # the cache is best-effort; never fail the build over it
 
 def main():
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     if not V1_PATH.exists() or not V2_PATH.exists():
         raise SystemExit("Place bill_v1.txt and bill_v2.txt in data/")
-    v1 = load_text(V1_PATH)
-    v2 = load_text(V2_PATH)
-
-    if FORCE_FULLTEXT:
-        s1=[{"sec_id":"ALL","title":"FULL TEXT (v1)","body":v1}]
-        s2=[{"sec_id":"ALL","title":"FULL TEXT (v2)","body":v2}]
+    st1, st2 = V1_PATH.stat(), V2_PATH.stat()
+    sig = (st1.st_mtime_ns, st1.st_size, st2.st_mtime_ns, st2.st_size)
+
+    cached = None if FORCE_FULLTEXT else _load_section_cache(sig)
+    if cached is not None:
+        s1, s2 = cached
+    elif FORCE_FULLTEXT:
+        s1=[{"sec_id":"ALL","title":"FULL TEXT (v1)","body":load_text(V1_PATH)}]
+        s2=[{"sec_id":"ALL","title":"FULL TEXT (v2)","body":load_text(V2_PATH)}]
     else:
-        s1 = split_sections(v1)
-        s2 = split_sections(v2)
+        s1 = split_sections(load_text(V1_PATH))
+        s2 = split_sections(load_text(V2_PATH))
+        _store_section_cache(sig, s1, s2)
 
     d1 = index_by_id(s1); d2 = index_by_id(s2)
     changes, stats, unchanged = summarize_changes(d1, d2)
-    out_html = build_html(changes, stats, unchanged)
-    (OUTPUT_DIR / "index.html").write_text(out_html, encoding="utf-8")
+    with open(OUTPUT_DIR / "index.html", "w", encoding="utf-8", buffering=1 << 20) as f:
+        build_html(changes, stats, unchanged, out=f)
     print("Done. Open output/index.html")
 
 if __name__ == "__main__":